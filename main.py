@@ -2,7 +2,10 @@ import sys
 import struct
 import os
 import zlib
-import json
+import io
+import bisect
+import mmap
+import itertools
 
 # --- Configuration & Constants ---
 DB_FILE_NAME = "mydb.db"
@@ -11,7 +14,11 @@ WAL_FILE_NAME = "wal.log"
 
 # INCREASED PAGE SIZE: 8KB allows internal nodes to hold ~1022 pointers.
 PAGE_SIZE = 8192 
-TABLE_MAX_PAGES = 5000
+# DB files are memory-mapped, growing the mapping this many pages at a time.
+MMAP_GROW_PAGES = 1024
+
+# The WAL is preallocated once and recycled from offset 0 when full.
+WAL_FILE_SIZE = 16 * 1024 * 1024
 
 # Row Format: ID (4) + Username (32) + Email (255) = 291 bytes
 ID_SIZE = 4
@@ -19,58 +26,139 @@ USERNAME_SIZE = 32
 EMAIL_SIZE = 255
 ROW_SIZE = ID_SIZE + USERNAME_SIZE + EMAIL_SIZE
 ROW_FMT = f'I{USERNAME_SIZE}s{EMAIL_SIZE}s'
+_ROW = struct.Struct(ROW_FMT)
 
 NODE_INTERNAL = 0
 NODE_LEAF = 1
 MAX_INT_KEY = 4294967295
 
+# Precompiled layouts so hot paths skip format-string lookup
+_U8 = struct.Struct('B')
+_U32 = struct.Struct('I')
+_NODE_HDR = struct.Struct('=BBII')  # Type, IsRoot, Parent, NumCells
+class _U32ArrayTable(dict):
+    # 'nI' structs indexed by cell count, built on first use: a tree only ever writes a few distinct counts,
+    # up to its max cells per page (1022 for internal nodes, more only for leaves with values under 4 bytes)
+    def __missing__(self, n):
+        self[n] = struct.Struct(f'{n}I')
+        return self[n]
+_U32_ARRAYS = _U32ArrayTable()
+_ZERO_PAGE = bytes(PAGE_SIZE)
+
+# WAL Record Format: Tag (1) + TxnID (4) [+ RowID (4) + Username (32) + Email (255) for START]
+WAL_START = 1
+WAL_COMMIT = 2
+START_FMT = f'<BII{USERNAME_SIZE}s{EMAIL_SIZE}s'
+COMMIT_FMT = '<BI'
+_START = struct.Struct(START_FMT)
+_COMMIT = struct.Struct(COMMIT_FMT)
+_WAL_RECORDS = {WAL_START: _START, WAL_COMMIT: _COMMIT}
+# Each flush_group() writes one group: Length (4) + Seq (4) + CRC32 of length, seq and records (4), then the records.
+# An all-zero header ends the log.
+GROUP_HDR_FMT = '<III'
+_GROUP_HDR = struct.Struct(GROUP_HDR_FMT)
+_GROUP_PREFIX = struct.Struct('<II')  # The (length, seq) part covered by the CRC
+
 # --- Global Helper Functions ---
 def serialize_row(row_id, username, email):
-    return struct.pack(ROW_FMT, row_id, username.encode('utf-8'), email.encode('utf-8'))
+    return _ROW.pack(row_id, username.encode('utf-8'), email.encode('utf-8'))
 
 def deserialize_row(data):
-    row_id, user_b, email_b = struct.unpack(ROW_FMT, data)
+    row_id, user_b, email_b = _ROW.unpack(data)
     return row_id, user_b.decode('utf-8').rstrip('\x00'), email_b.decode('utf-8').rstrip('\x00')
 
 def hash_email(email):
-    return zlib.crc32(email.encode('utf-8')) & 0xffffffff
+    # No 0xffffffff mask: zlib.crc32 already returns an unsigned 32-bit int
+    return zlib.crc32(email.encode())
 
 # --- Write-Ahead Log ---
 class WAL:
     def __init__(self, filename=WAL_FILE_NAME):
         self.filename = filename
-        self.file = open(filename, "a+")
+        # Zero-filled once + O_DSYNC: each group write is durable on return and lands on blocks that are
+        # already allocated and written, so there is no fsync and no extent or size metadata update per group.
+        # O_DSYNC and os.pwrite make the WAL POSIX-only.
+        fd = os.open(filename, os.O_RDWR | os.O_CREAT | os.O_DSYNC, 0o644)
+        size = os.fstat(fd).st_size
+        while size < WAL_FILE_SIZE:
+            size += os.pwrite(fd, bytes(min(WAL_FILE_SIZE - size, 1024 * 1024)), size)
+        self.file = os.fdopen(fd, "r+b")
         self.txn_counter = 0
+        # Group commit: records are staged here and made durable by one write in flush_group()
+        self.buf = io.BytesIO()
+        self.write_off = 0
+        self.group_seq = 0
+        with self._map() as mm:
+            for off, length, seq in self._groups(mm, len(mm)):
+                self.write_off, self.group_seq = off + length, seq
+
+    def _map(self):
+        # Read-only mapping of the whole log, so scans run over the page cache without copying it
+        return mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _groups(self, buf, end):
+        # Yields (records_offset, length, seq) per intact group. The live log ends at the zero header after the
+        # last group, or at the first group that fails its CRC (a torn write) or does not continue the sequence
+        # (a group left over from before a wrap-around, or a stale header exposed by a torn terminator).
+        off, expected = 0, None
+        while off + _GROUP_HDR.size <= end:
+            length, seq, crc = _GROUP_HDR.unpack_from(buf, off)
+            start = off + _GROUP_HDR.size
+            if not length or start + length > end or (expected is not None and seq != expected): return
+            if self._group_crc(length, seq, buf[start:start + length]) != crc: return
+            yield start, length, seq
+            off, expected = start + length, seq + 1
+
+    @staticmethod
+    def _group_crc(length, seq, data):
+        return zlib.crc32(data, zlib.crc32(_GROUP_PREFIX.pack(length, seq)))
+
+    def _records(self, buf, end):
+        # Yields (offset, tag, txn_id) per record of the live log; every record starts with the COMMIT layout
+        for start, length, _ in self._groups(buf, end):
+            off = start
+            while off < start + length:
+                tag, txn_id = _COMMIT.unpack_from(buf, off)
+                yield off, tag, txn_id
+                off += _WAL_RECORDS[tag].size
 
     def log_start(self, row_id, username, email):
         self.txn_counter += 1
-        entry = {"txn_id": self.txn_counter, "status": "START", "action": "INSERT", "data": {"id": row_id, "user": username, "email": email}}
-        self.file.write(json.dumps(entry) + "\n")
-        self.file.flush()
-        os.fsync(self.file.fileno())
+        self.buf.write(_START.pack(WAL_START, self.txn_counter, row_id, username.encode('utf-8'), email.encode('utf-8')))
         return self.txn_counter
 
     def log_commit(self, txn_id):
-        entry = {"txn_id": txn_id, "status": "COMMIT"}
-        self.file.write(json.dumps(entry) + "\n")
-        self.file.flush()
-        os.fsync(self.file.fileno())
+        self.buf.write(_COMMIT.pack(WAL_COMMIT, txn_id))
+
+    def flush_group(self):
+        data = self.buf.getvalue()
+        if not data: return
+        self.group_seq += 1
+        group = _GROUP_HDR.pack(len(data), self.group_seq, self._group_crc(len(data), self.group_seq, data)) + data
+        # Wrap around when full; everything past the zero header written after the group is stale
+        if self.write_off + len(group) + _GROUP_HDR.size > WAL_FILE_SIZE: self.write_off = 0
+        os.pwrite(self.file.fileno(), group + bytes(_GROUP_HDR.size), self.write_off)
+        self.write_off += len(group)
+        self.buf = io.BytesIO()
 
     def recover(self, db, idx):
-        self.file.seek(0)
-        active_txns = {}
-        for line in self.file:
-            if not line.strip(): continue
-            entry = json.loads(line)
-            if entry["status"] == "START": active_txns[entry["txn_id"]] = entry["data"]
-            elif entry["status"] == "COMMIT" and entry["txn_id"] in active_txns: del active_txns[entry["txn_id"]]
-        
-        if active_txns:
-            print(f"CRASH DETECTED. Recovering {len(active_txns)} txns...")
-            for txn_id, data in active_txns.items():
-                db.insert(data['id'], serialize_row(data['id'], data['user'], data['email']))
-                idx.insert(hash_email(data['email']), struct.pack('I', data['id']))
-                self.log_commit(txn_id)
+        with self._map() as mm:
+            # Only the fixed (tag, txn_id) prefix is decoded while scanning; START payloads are
+            # unpacked later, and only for transactions that never committed
+            active_txns = {}  # txn_id -> offset of its START record
+            for off, tag, txn_id in self._records(mm, self.write_off):
+                if tag == WAL_START: active_txns[txn_id] = off
+                else: active_txns.pop(txn_id, None)
+            
+            if active_txns:
+                print(f"CRASH DETECTED. Recovering {len(active_txns)} txns...")
+                for txn_id, off in active_txns.items():
+                    _, _, row_id, user_b, email_b = _START.unpack_from(mm, off)
+                    user, email = user_b.decode('utf-8').rstrip('\x00'), email_b.decode('utf-8').rstrip('\x00')
+                    db.insert(row_id, serialize_row(row_id, user, email))
+                    idx.insert(hash_email(email), row_id)
+                    self.log_commit(txn_id)
+                self.flush_group()
 
 # --- Disk Pager ---
 class Pager:
@@ -82,151 +170,272 @@ class Pager:
         self.file_length = self.file.tell()
         self.num_pages = self.file_length // PAGE_SIZE
         if self.file_length % PAGE_SIZE: self.num_pages += 1
-        self.pages = [None] * TABLE_MAX_PAGES
+        # The kernel page cache is the buffer pool: pages are views straight into the mapping
+        self.mm, self.view, self.words, self.retired_maps = None, None, None, []
+        self.dirty = set()
+        self._map(max(self.num_pages, 1))
+        # While open the file is padded to the mapping capacity, and only close() trims it, so after an unclean
+        # exit the size overstates the page count. Every allocated page holds a non-zero header byte, so
+        # trailing all-zero pages were never allocated.
+        while self.num_pages and self.mm[(self.num_pages - 1) * PAGE_SIZE:self.num_pages * PAGE_SIZE] == _ZERO_PAGE:
+            self.num_pages -= 1
+
+    def _map(self, min_pages):
+        capacity = -(-min_pages // MMAP_GROW_PAGES) * MMAP_GROW_PAGES
+        if os.fstat(self.file.fileno()).st_size < capacity * PAGE_SIZE:
+            os.ftruncate(self.file.fileno(), capacity * PAGE_SIZE)
+        # Views handed out from a smaller mapping stay valid (MAP_SHARED on the same file), so a retired map is kept
+        # only while page views into it are alive; mmap refuses to close while it has exports, which is the check
+        if self.mm is not None:
+            self.words.release(); self.view.release()
+            self.retired_maps.append(self.mm)
+            self.retired_maps = [mm for mm in self.retired_maps if not self._close_if_unused(mm)]
+        self.mm = mmap.mmap(self.file.fileno(), capacity * PAGE_SIZE)
+        self.view = memoryview(self.mm)
+        # Flat uint32 view of the whole file, for aligned key/pointer columns
+        self.words = self.view.cast('I')
+        self.capacity = capacity
+
+    @staticmethod
+    def _close_if_unused(mm):
+        try: mm.close()
+        except BufferError: return False
+        return True
 
     def get_page(self, page_num):
-        if self.pages[page_num] is None:
-            if page_num < self.num_pages:
-                self.file.seek(page_num * PAGE_SIZE)
-                data = self.file.read(PAGE_SIZE)
-                self.pages[page_num] = bytearray(data.ljust(PAGE_SIZE, b'\x00'))
-            else:
-                self.pages[page_num] = bytearray(PAGE_SIZE)
-                self.num_pages = max(self.num_pages, page_num + 1)
-        return self.pages[page_num]
-
-    def flush(self, page_num):
-        if self.pages[page_num] is None: return
-        self.file.seek(page_num * PAGE_SIZE)
-        self.file.write(self.pages[page_num])
+        off = page_num * PAGE_SIZE
+        if page_num >= self.num_pages:
+            if page_num >= self.capacity: self._map(page_num + 1)
+            self.mm[off:off + PAGE_SIZE] = _ZERO_PAGE
+            self.num_pages = page_num + 1
+            self.dirty.add(page_num)
+        return self.view[off:off + PAGE_SIZE]
+
+    def mark_dirty(self, page_num):
+        self.dirty.add(page_num)
+
+    def _sync(self, start_page, end_page):
+        # msync offsets must be aligned to the OS page size, which may exceed PAGE_SIZE
+        start = start_page * PAGE_SIZE // mmap.PAGESIZE * mmap.PAGESIZE
+        self.mm.flush(start, end_page * PAGE_SIZE - start)
 
     def close(self):
-        for i, page in enumerate(self.pages):
-            if page: self.flush(i)
+        # Write back dirty pages as maximal runs of adjacent pages: one msync per run, clean ranges untouched
+        for _, run in itertools.groupby(enumerate(sorted(self.dirty)), lambda p: p[1] - p[0]):
+            run = [page_num for _, page_num in run]
+            self._sync(run[0], run[-1] + 1)
+        self.dirty.clear()
+        self.words.release(); self.view.release()
+        for mm in self.retired_maps + [self.mm]: mm.close()
+        # Drop the unused tail of the last mapping chunk
+        self.file.truncate(self.num_pages * PAGE_SIZE)
         self.file.close()
 
 # --- The Advanced B-Tree Engine ---
 class BTree:
-    def __init__(self, filename, val_size):
+    def __init__(self, filename, val_size, val_type='bytes'):
+        # val_type 'bytes': values are fixed-size byte strings. 'uint32': values are ints stored as a
+        # plain 4-byte column, so insert/search take and return ints with no pack/unpack by the caller.
+        if val_type not in ('bytes', 'uint32') or (val_type == 'uint32' and val_size != 4):
+            raise ValueError(f"Unsupported value type {val_type!r} of size {val_size}")
         self.val_size = val_size
+        self.val_type = val_type
         self.key_size = 4
         self.leaf_cell_size = self.key_size + self.val_size
         self.internal_cell_size = 8
+        self.leaf_value = _U32 if val_type == 'uint32' else struct.Struct(f'{self.val_size}s')
         
         self.OFF_TYPE, self.OFF_ROOT, self.OFF_PARENT, self.OFF_CELLS, self.OFF_NEXT = 0, 1, 2, 6, 10
-        self.header_size = 14
+        # 14 header bytes padded to 16 so the key column is 4-byte aligned
+        self.header_size = 16
         self.max_leaf_cells = (PAGE_SIZE - self.header_size) // self.leaf_cell_size
         self.max_internal_cells = (PAGE_SIZE - self.header_size) // self.internal_cell_size
+        # Structure-of-arrays pages: [header][keys column][values / ptrs column]
+        self.OFF_LEAF_VALUES = self.header_size + self.max_leaf_cells * self.key_size
+        self.OFF_INTERNAL_PTRS = self.header_size + self.max_internal_cells * self.key_size
         
         self.pager = Pager(filename)
-        if self.pager.file_length == 0:
+        if self.pager.num_pages == 0:
             self._init_leaf(self.pager.get_page(0), is_root=True)
 
     def _init_leaf(self, node, is_root=False):
-        struct.pack_into('BBII', node, 0, NODE_LEAF, 1 if is_root else 0, 0, 0)
-        struct.pack_into('I', node, self.OFF_NEXT, 0)
+        _NODE_HDR.pack_into(node, 0, NODE_LEAF, 1 if is_root else 0, 0, 0)
+        _U32.pack_into(node, self.OFF_NEXT, 0)
 
     def _init_internal(self, node, is_root=False):
-        struct.pack_into('BBII', node, 0, NODE_INTERNAL, 1 if is_root else 0, 0, 0)
+        _NODE_HDR.pack_into(node, 0, NODE_INTERNAL, 1 if is_root else 0, 0, 0)
+
+    # --- Column-Based Memory Parsers ---
+    # Reads return zero-copy views over the page: uint32 key/ptr columns and the raw value column.
+    # Writes take any int sequence for keys/ptrs and a packed value column (n * val_size bytes).
+    def _keys(self, node):
+        n = _U32.unpack_from(node, self.OFF_CELLS)[0]
+        return node[self.header_size:self.header_size + n * self.key_size].cast('I')
 
-    # --- List-Based Memory Parsers ---
     def _read_leaf(self, node):
-        cells = []
-        for i in range(struct.unpack_from('I', node, self.OFF_CELLS)[0]):
-            off = self.header_size + i * self.leaf_cell_size
-            cells.append((struct.unpack_from('I', node, off)[0], node[off+4:off+self.leaf_cell_size]))
-        return cells
-
-    def _write_leaf(self, node, cells):
-        struct.pack_into('I', node, self.OFF_CELLS, len(cells))
-        for i, (k, v) in enumerate(cells):
-            off = self.header_size + i * self.leaf_cell_size
-            struct.pack_into('I', node, off, k)
-            node[off+4:off+self.leaf_cell_size] = v
+        keys = self._keys(node)
+        return keys, node[self.OFF_LEAF_VALUES:self.OFF_LEAF_VALUES + len(keys) * self.val_size]
+
+    def _pack_values(self, values):
+        if self.val_type == 'uint32': return _U32_ARRAYS[len(values)].pack(*values)
+        # Pack each value like insert() does, so short values are padded to val_size instead of shifting the column
+        return b''.join(map(self.leaf_value.pack, values))
+
+    def _write_leaf(self, node, keys, values):
+        _U32.pack_into(node, self.OFF_CELLS, len(keys))
+        _U32_ARRAYS[len(keys)].pack_into(node, self.header_size, *keys)
+        node[self.OFF_LEAF_VALUES:self.OFF_LEAF_VALUES + len(values)] = values
 
     def _read_internal(self, node):
-        cells = []
-        for i in range(struct.unpack_from('I', node, self.OFF_CELLS)[0]):
-            off = self.header_size + i * self.internal_cell_size
-            cells.append({'key': struct.unpack_from('I', node, off)[0], 'ptr': struct.unpack_from('I', node, off+4)[0]})
-        return cells
-
-    def _write_internal(self, node, cells):
-        struct.pack_into('I', node, self.OFF_CELLS, len(cells))
-        for i, c in enumerate(cells):
-            off = self.header_size + i * self.internal_cell_size
-            struct.pack_into('I', node, off, c['key'])
-            struct.pack_into('I', node, off+4, c['ptr'])
+        keys = self._keys(node)
+        return keys, node[self.OFF_INTERNAL_PTRS:self.OFF_INTERNAL_PTRS + len(keys) * self.key_size].cast('I')
+
+    def _write_internal(self, node, keys, ptrs):
+        n = len(keys)
+        _U32.pack_into(node, self.OFF_CELLS, n)
+        _U32_ARRAYS[n].pack_into(node, self.header_size, *keys)
+        _U32_ARRAYS[n].pack_into(node, self.OFF_INTERNAL_PTRS, *ptrs)
 
     # --- Core Logic ---
-    def find_leaf_page(self, key):
+    def _descend(self, key):
+        # Root-to-leaf walk straight over the mapped file: no page views or key tuples per level.
+        # Returns the leaf page and the bisect_left slot of key within it.
+        mm, words = self.pager.mm, self.pager.words
         page_num = 0
-        node = self.pager.get_page(page_num)
-        while struct.unpack_from('B', node, self.OFF_TYPE)[0] == NODE_INTERNAL:
-            cells = self._read_internal(node)
-            page_num = next((c['ptr'] for c in cells if key <= c['key']), cells[-1]['ptr'])
-            node = self.pager.get_page(page_num)
-        return page_num
+        while True:
+            off = page_num * PAGE_SIZE
+            n = _U32.unpack_from(mm, off + self.OFF_CELLS)[0]
+            lo = (off + self.header_size) // 4
+            i = bisect.bisect_left(words, key, lo, lo + n) - lo
+            if mm[off + self.OFF_TYPE] != NODE_INTERNAL: return page_num, i
+            # No bounds clamp needed: an internal node's last key is never below a key routed to it
+            # (MAX_INT_KEY on the rightmost path), so bisect_left always lands on a real child
+            page_num = words[(off + self.OFF_INTERNAL_PTRS) // 4 + i]
+
+    def find_leaf_page(self, key):
+        return self._descend(key)[0]
 
     def search(self, key):
-        node = self.pager.get_page(self.find_leaf_page(key))
-        return next((v for k, v in self._read_leaf(node) if k == key), None)
+        page_num, i = self._descend(key)
+        mm, off = self.pager.mm, page_num * PAGE_SIZE
+        if i == _U32.unpack_from(mm, off + self.OFF_CELLS)[0]: return None
+        if self.pager.words[(off + self.header_size) // 4 + i] != key: return None
+        return self.leaf_value.unpack_from(mm, off + self.OFF_LEAF_VALUES + i * self.val_size)[0]
 
-    def insert(self, key, val_bytes):
+    def insert(self, key, value):
         page_num = self.find_leaf_page(key)
         node = self.pager.get_page(page_num)
-        cells = self._read_leaf(node)
-        
-        cells.append((key, val_bytes))
-        cells.sort(key=lambda x: x[0])
+        self.pager.mark_dirty(page_num)
+        n = _U32.unpack_from(node, self.OFF_CELLS)[0]
         
-        if len(cells) <= self.max_leaf_cells:
-            self._write_leaf(node, cells)
+        if n < self.max_leaf_cells:
+            # FAST PATH: open a gap at the slot after any equal keys by shifting the tail of each
+            # column up one cell (an in-place memmove), then write the new cell into it
+            lo = (page_num * PAGE_SIZE + self.header_size) // 4
+            i = bisect.bisect_right(self.pager.words, key, lo, lo + n) - lo
+            k_off = self.header_size + i * self.key_size
+            v_off = self.OFF_LEAF_VALUES + i * self.val_size
+            node[k_off + self.key_size:self.header_size + (n + 1) * self.key_size] = node[k_off:self.header_size + n * self.key_size]
+            node[v_off + self.val_size:self.OFF_LEAF_VALUES + (n + 1) * self.val_size] = node[v_off:self.OFF_LEAF_VALUES + n * self.val_size]
+            _U32.pack_into(node, k_off, key)
+            self.leaf_value.pack_into(node, v_off, value)
+            _U32.pack_into(node, self.OFF_CELLS, n + 1)
             return
 
+        # Build the merged columns once (the value column is copied out of the page, so the
+        # writes below never read from bytes they have already overwritten)
+        keys, values = self._read_leaf(node)
+        i = bisect.bisect_right(keys, key)
+        v_off = i * self.val_size
+        values = b''.join((values[:v_off], self.leaf_value.pack(value), values[v_off:]))
+        keys = keys.tolist()
+        keys.insert(i, key)
+
         # SPLIT LEAF LOGIC
-        split_idx = len(cells) // 2
-        self._write_leaf(node, cells[:split_idx])
+        split_idx = len(keys) // 2
+        split_off = split_idx * self.val_size
+        self._write_leaf(node, keys[:split_idx], values[:split_off])
         
         new_page_num = self.pager.num_pages
         new_node = self.pager.get_page(new_page_num)
         self._init_leaf(new_node)
-        self._write_leaf(new_node, cells[split_idx:])
+        self._write_leaf(new_node, keys[split_idx:], values[split_off:])
         
         # Pointers
-        struct.pack_into('I', new_node, self.OFF_NEXT, struct.unpack_from('I', node, self.OFF_NEXT)[0])
-        struct.pack_into('I', node, self.OFF_NEXT, new_page_num)
-        left_max_key = cells[:split_idx][-1][0]
+        _U32.pack_into(new_node, self.OFF_NEXT, _U32.unpack_from(node, self.OFF_NEXT)[0])
+        _U32.pack_into(node, self.OFF_NEXT, new_page_num)
+        left_max_key = keys[split_idx - 1]
         
         # PARENT ROUTING
-        if struct.unpack_from('B', node, self.OFF_ROOT)[0]:
+        if _U8.unpack_from(node, self.OFF_ROOT)[0]:
             left_page_num = self.pager.num_pages
             left_node = self.pager.get_page(left_page_num)
             left_node[:] = node[:]
-            struct.pack_into('B', left_node, self.OFF_ROOT, 0)
+            _U8.pack_into(left_node, self.OFF_ROOT, 0)
             
             self._init_internal(node, is_root=True)
-            self._write_internal(node, [{'key': left_max_key, 'ptr': left_page_num}, {'key': MAX_INT_KEY, 'ptr': new_page_num}])
-            struct.pack_into('I', left_node, self.OFF_PARENT, 0)
-            struct.pack_into('I', new_node, self.OFF_PARENT, 0)
+            self._write_internal(node, [left_max_key, MAX_INT_KEY], [left_page_num, new_page_num])
+            _U32.pack_into(left_node, self.OFF_PARENT, 0)
+            _U32.pack_into(new_node, self.OFF_PARENT, 0)
         else:
-            parent_page = struct.unpack_from('I', node, self.OFF_PARENT)[0]
-            struct.pack_into('I', new_node, self.OFF_PARENT, parent_page)
+            parent_page = _U32.unpack_from(node, self.OFF_PARENT)[0]
+            _U32.pack_into(new_node, self.OFF_PARENT, parent_page)
             self._insert_internal(parent_page, left_max_key, page_num, new_page_num)
 
+    def bulk_load(self, pairs):
+        # Build an empty tree bottom-up from (key, value) pairs: full leaves are written in one sequential
+        # pass, then each internal level is built from its children's max keys. No splits, no re-sorting.
+        if self.pager.num_pages > 1 or self._keys(self.pager.get_page(0)):
+            raise ValueError("bulk_load requires an empty tree")
+        pairs = sorted(pairs, key=lambda p: p[0])
+        if len(pairs) <= self.max_leaf_cells:
+            self.pager.mark_dirty(0)
+            return self._write_leaf(self.pager.get_page(0), [k for k, _ in pairs], self._pack_values([v for _, v in pairs]))
+
+        # Leaves and lower internal levels are appended after page 0, which is rewritten as the root last
+        level = []  # (page_num, max_key) of the most recently built level
+        for start in range(0, len(pairs), self.max_leaf_cells):
+            chunk = pairs[start:start + self.max_leaf_cells]
+            page_num = self.pager.num_pages
+            node = self.pager.get_page(page_num)
+            self._init_leaf(node)
+            self._write_leaf(node, [k for k, _ in chunk], self._pack_values([v for _, v in chunk]))
+            if level: _U32.pack_into(self.pager.get_page(level[-1][0]), self.OFF_NEXT, page_num)
+            level.append((page_num, chunk[-1][0]))
+
+        while True:
+            is_root = len(level) <= self.max_internal_cells
+            # Spread children evenly so internal nodes keep room for later leaf splits
+            fanout = -(-len(level) // -(-len(level) // self.max_internal_cells))
+            parents = []
+            for start in range(0, len(level), fanout):
+                children = level[start:start + fanout]
+                page_num = 0 if is_root else self.pager.num_pages
+                node = self.pager.get_page(page_num)
+                self.pager.mark_dirty(page_num)
+                self._init_internal(node, is_root=is_root)
+                keys = [k for _, k in children]
+                # The rightmost node of every level routes all larger keys, as after a root split
+                if start + fanout >= len(level): keys[-1] = MAX_INT_KEY
+                self._write_internal(node, keys, [p for p, _ in children])
+                for child, _ in children: _U32.pack_into(self.pager.get_page(child), self.OFF_PARENT, page_num)
+                parents.append((page_num, keys[-1]))
+            if is_root: return
+            level = parents
+
     def _insert_internal(self, page_num, left_max_key, left_child, right_child):
         node = self.pager.get_page(page_num)
-        cells = self._read_internal(node)
+        self.pager.mark_dirty(page_num)
+        keys, ptrs = (col.tolist() for col in self._read_internal(node))
         
-        for i, c in enumerate(cells):
-            if c['ptr'] == left_child:
-                old_key = c['key']
-                cells[i]['key'] = left_max_key
-                cells.insert(i + 1, {'key': old_key, 'ptr': right_child})
-                break
+        if left_child in ptrs:
+            i = ptrs.index(left_child)
+            keys.insert(i + 1, keys[i])
+            keys[i] = left_max_key
+            ptrs.insert(i + 1, right_child)
                 
-        if len(cells) <= self.max_internal_cells:
-            self._write_internal(node, cells)
+        if len(keys) <= self.max_internal_cells:
+            self._write_internal(node, keys, ptrs)
         else:
             print("FATAL: Internal Node limit reached. Increase PAGE_SIZE further.")
             sys.exit(1)
@@ -242,21 +451,24 @@ def execute_insert(command, db, idx, wal):
     except: return print("Error: ID must be int")
     
     txn_id = wal.log_start(row_id, parts[2], parts[3])
+    # The START must be durable before either tree changes, so recovery can replay a half-applied insert
+    wal.flush_group()
     db.insert(row_id, serialize_row(row_id, parts[2], parts[3]))
-    idx.insert(hash_email(parts[3]), struct.pack('I', row_id))
+    idx.insert(hash_email(parts[3]), row_id)
     wal.log_commit(txn_id)
+    wal.flush_group()
     print("Executed.")
 
 def execute_where(command, db, idx):
     parts = command.strip().split('=')
     if len(parts) != 2: return print("Error: Syntax 'where email=<email>'")
-    id_bytes = idx.search(hash_email(parts[1].strip()))
-    if not id_bytes: return print("Not found.")
-    row_bytes = db.search(struct.unpack('I', id_bytes)[0])
+    row_id = idx.search(hash_email(parts[1].strip()))
+    if row_id is None: return print("Not found.")
+    row_bytes = db.search(row_id)
     print(f"Result: {deserialize_row(row_bytes)}" if row_bytes else "Corruption detected.")
 
 def main():
-    db, idx, wal = BTree(DB_FILE_NAME, ROW_SIZE), BTree(IDX_FILE_NAME, 4), WAL()
+    db, idx, wal = BTree(DB_FILE_NAME, ROW_SIZE), BTree(IDX_FILE_NAME, 4, val_type='uint32'), WAL()
     wal.recover(db, idx)
     try:
         while True: